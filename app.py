@@ -7,16 +7,24 @@ Flask Backend Application
 """
 
 import os
-import io
 import zipfile
-import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
-from statistics import median
+import hashlib
+import threading
+import time
+import tempfile
+from functools import wraps
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 
 import requests
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import numpy as np
+import orjson
+from lxml import etree
 from flask import Flask, jsonify, request, render_template
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from dotenv import load_dotenv
 from cachetools import TTLCache
@@ -24,7 +32,24 @@ from cachetools import TTLCache
 # 환경변수 로드
 load_dotenv()
 
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON 직렬화를 orjson으로 처리"""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)
 
 # ============================================================================
@@ -42,6 +67,40 @@ ecos_cache = TTLCache(maxsize=256, ttl=21600)
 fred_cache = TTLCache(maxsize=256, ttl=21600)
 corp_code_cache = TTLCache(maxsize=10, ttl=86400)  # 24시간
 
+# corp_code 인덱스 디스크 캐시 (워커 재시작 시 재사용, 24시간)
+CORP_INDEX_PATH = os.getenv('CORP_INDEX_PATH', os.path.join(tempfile.gettempdir(), 'dart_corp_index.json'))
+CORP_INDEX_MAX_AGE = 86400
+
+# corp_code ZIP 다운로드 시 메모리에 유지할 최대 크기 (초과분은 임시 파일로)
+CORP_ZIP_SPOOL_SIZE = 32 * 1024 * 1024
+
+# 실패 결과 캐시 (TTL: 60초) 및 동일 요청 동시 실행 방지용 키별 락
+# inflight_locks: key -> [Lock, 참조 수], 마지막 호출이 끝나면 삭제
+error_cache = TTLCache(maxsize=128, ttl=60)
+inflight_locks = {}
+inflight_guard = threading.Lock()
+
+# ============================================================================
+# HTTP 세션 (DART/ECOS/FRED 공용, 커넥션 풀 재사용)
+# ============================================================================
+# 재시도는 연결 실패에만 적용 (응답을 받은 요청은 상태코드와 무관하게 재시도하지 않음)
+# 호출당 최악: 연결 4회 x 5초 + backoff 약 2초 + 읽기 타임아웃 1회 (gunicorn --timeout 120 이내 유지)
+HTTP_CONNECT_TIMEOUT = 5
+
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        connect=3,
+        read=False,
+        status=0,
+        backoff_factor=0.3,
+        respect_retry_after_header=False
+    )
+))
+
 # ============================================================================
 # 회사 매핑 (corp_code 하드코딩 - DART에서 조회한 값)
 # ============================================================================
@@ -52,153 +111,311 @@ COMPANY_MAP = {
     'shinhan': {'name': '신한라이프', 'corp_code': '00137517'} # 신한라이프생명보험주식회사
 }
 
+# 분기말 금리가 없을 때 직전 영업일을 찾는 최대 일수
+RATE_LOOKBACK_DAYS = 9
+
+# DART 보고서 유형별 분기말 (1분기, 반기, 3분기, 사업)
+REPORT_CODES = (
+    ('11013', (3, 31), '1Q'),   # 1분기보고서
+    ('11012', (6, 30), '2Q'),   # 반기보고서
+    ('11014', (9, 30), '3Q'),   # 3분기보고서
+    ('11011', (12, 31), '4Q'),  # 사업보고서
+)
+
+# DART 계정명(공백 제거) -> 응답 필드
+ACCOUNT_MAP = {
+    '자본총계': 'equity',
+    '자산총계': 'asset',
+    '부채총계': 'liability',
+}
+
+# DART 분기 조회 동시 요청 수
+DART_FETCH_WORKERS = 8
+
+# 회사명 정규화 시 제거할 공백 문자 및 법인 표기
+CORP_NAME_DELETE_TABLE = str.maketrans('', '', ' \t\r\n')
+CORP_NAME_TOKENS = ('(주)', '주식회사')
+
 # ECOS 국고채 10년 시계열 코드 (탐색 후 캐싱)
 ECOS_KR10Y_CODE = None
 
 
-def get_corp_codes():
-    """DART에서 corp_code ZIP 다운로드 후 3사 매핑"""
-    cache_key = 'corp_codes'
-    if cache_key in corp_code_cache:
-        return corp_code_cache[cache_key]
+def cached_locked(func):
+    """
+    캐시 미스 구간 보호 데코레이터
+
+    동일 인자로 동시에 들어온 호출은 첫 호출만 외부 API를 조회하고 나머지는 대기 후
+    채워진 캐시를 사용한다. 실패한 호출은 error_cache에 60초간 저장하여 재시도를 막는다.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__name__, repr(args), repr(sorted(kwargs.items())))
+
+        with inflight_guard:
+            error = error_cache.get(key)
+            if error is None:
+                entry = inflight_locks.get(key)
+                if entry is None:
+                    entry = inflight_locks[key] = [threading.Lock(), 0]
+                entry[1] += 1
+        if error is not None:
+            raise Exception(error)
+
+        try:
+            with entry[0]:
+                with inflight_guard:
+                    error = error_cache.get(key)
+                if error is not None:
+                    raise Exception(error)
+
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    with inflight_guard:
+                        error_cache[key] = str(e)
+                    raise
+        finally:
+            # 대기 중인 호출이 없으면 락 제거 (사용 중인 락은 삭제되지 않음)
+            with inflight_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del inflight_locks[key]
+
+    return wrapper
+
+
+def normalize_corp_name(name: str):
+    """회사명 정규화 (공백, '(주)', '주식회사' 제거)"""
+    name = name.translate(CORP_NAME_DELETE_TABLE)
+    for token in CORP_NAME_TOKENS:
+        name = name.replace(token, '')
+    return name
+
+
+def parse_json(response):
+    """API 응답 JSON 파싱 (orjson)"""
+    return orjson.loads(response.content)
+
+
+def iter_corp_list(xml_stream):
+    """corpCode XML의 <list> 항목을 스트리밍으로 순회 (corp_name, corp_code, stock_code)"""
+    for _, elem in etree.iterparse(xml_stream, tag='list'):
+        # 하위 태그를 한 번만 순회 (태그별 find 호출 없음)
+        fields = {child.tag: child.text for child in elem}
+        yield (
+            fields.get('corp_name') or '',
+            fields.get('corp_code') or '',
+            fields.get('stock_code') or ''
+        )
+        # 처리한 항목 해제 (메모리 사용량을 항목 1개 수준으로 유지)
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+
+def load_corp_index_file():
+    """디스크에 저장된 회사명 인덱스 로드 (없거나 24시간 경과 시 None)"""
+    try:
+        built_at = os.path.getmtime(CORP_INDEX_PATH)
+        if time.time() - built_at >= CORP_INDEX_MAX_AGE:
+            return None
+        with open(CORP_INDEX_PATH, 'rb') as f:
+            data = orjson.loads(f.read())
+        return {
+            'records': [tuple(record) for record in data['records']],
+            'built_at': built_at
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_corp_index_file(index: dict):
+    """회사명 인덱스를 디스크에 저장 (임시 파일 작성 후 교체하여 워커 간 충돌 방지)"""
+    tmp_path = f"{CORP_INDEX_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps({'records': index['records']}))
+        os.replace(tmp_path, CORP_INDEX_PATH)
+    except OSError as e:
+        print(f"corp_code 인덱스 저장 실패: {e}")
+
+
+@cached_locked
+def build_corp_index():
+    """DART corp_code ZIP 다운로드 후 회사명 인덱스 구성 (메모리/디스크 24시간 캐싱)"""
+    cache_key = 'index'
+
+    # 메모리 캐시도 인덱스 생성 시각(built_at) 기준으로 만료 (디스크에서 읽은 인덱스 포함)
+    index = corp_code_cache.get(cache_key)
+    if index is not None and time.time() - index['built_at'] < CORP_INDEX_MAX_AGE:
+        return index
+
+    # 다른 워커가 저장한 인덱스 재사용
+    index = load_corp_index_file()
+    if index is not None:
+        corp_code_cache[cache_key] = index
+        return index
 
     if not DART_API_KEY:
         raise ValueError("DART_API_KEY가 설정되지 않았습니다.")
 
     url = f"https://opendart.fss.or.kr/api/corpCode.xml?crtfc_key={DART_API_KEY}"
 
-    try:
-        response = requests.get(url, timeout=60)
+    # (corp_name, corp_code, stock_code) 목록 (문서 순서 유지, 동일 회사명 포함)
+    records = []
+
+    # ZIP은 스트리밍으로 받아 임시 파일에 보관 (일정 크기 초과 시 디스크 사용)
+    with SESSION.get(url, stream=True, timeout=(HTTP_CONNECT_TIMEOUT, 60)) as response, \
+            tempfile.SpooledTemporaryFile(max_size=CORP_ZIP_SPOOL_SIZE) as zip_file:
         response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=1024 * 1024):
+            zip_file.write(chunk)
+        zip_file.seek(0)
 
-        # ZIP 파일 해제
-        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+        with zipfile.ZipFile(zip_file) as z:
             xml_filename = z.namelist()[0]
             with z.open(xml_filename) as f:
-                tree = ET.parse(f)
-                root = tree.getroot()
+                for corp_name, corp_code, stock_code in iter_corp_list(f):
+                    if not corp_name:
+                        continue
+                    records.append((corp_name, corp_code, stock_code))
+
+    index = {'records': records, 'built_at': time.time()}
+    save_corp_index_file(index)
+    corp_code_cache[cache_key] = index
+    return index
 
-        corp_codes = {}
 
-        for company_id, info in COMPANY_MAP.items():
-            search_name = info['search_name']
-            found = False
+def get_corp_codes():
+    """DART corp_code 인덱스에서 3사 매핑"""
+    cache_key = 'corp_codes'
 
-            for corp in root.findall('.//list'):
-                corp_name = corp.find('corp_name').text if corp.find('corp_name') is not None else ''
-                corp_code = corp.find('corp_code').text if corp.find('corp_code') is not None else ''
+    # 매핑 결과는 원본 인덱스와 같은 시각에 만료
+    cached = corp_code_cache.get(cache_key)
+    if cached is not None and time.time() - cached['built_at'] < CORP_INDEX_MAX_AGE:
+        return cached['corp_codes']
 
-                # 완전 일치 또는 포함 매칭
-                if search_name in corp_name or corp_name in search_name:
-                    corp_codes[company_id] = corp_code
-                    found = True
-                    break
+    try:
+        index = build_corp_index()
+        records = index['records']
 
-            if not found:
-                # 공백/특수문자 제거 후 재시도
-                clean_search = search_name.replace(' ', '').replace('(주)', '').replace('주식회사', '')
-                for corp in root.findall('.//list'):
-                    corp_name = corp.find('corp_name').text if corp.find('corp_name') is not None else ''
-                    clean_name = corp_name.replace(' ', '').replace('(주)', '').replace('주식회사', '')
+        # 검색어 정규화는 회사별로 한 번만 수행
+        search_names = {
+            company_id: (info['name'], normalize_corp_name(info['name']))
+            for company_id, info in COMPANY_MAP.items()
+        }
 
+        # 포함 매칭: 인덱스를 한 번만 순회하며 전체 회사를 검사
+        exact_matches = {}
+        clean_matches = {}
+
+        for corp_name, corp_code, _ in records:
+            clean_name = None
+            for company_id, (search_name, clean_search) in search_names.items():
+                if company_id not in exact_matches and (search_name in corp_name or corp_name in search_name):
+                    exact_matches[company_id] = corp_code
+                if company_id not in clean_matches:
+                    # 공백/특수문자 제거 후 매칭
+                    if clean_name is None:
+                        clean_name = normalize_corp_name(corp_name)
                     if clean_search in clean_name or clean_name in clean_search:
-                        corp_codes[company_id] = corp.find('corp_code').text
-                        break
+                        clean_matches[company_id] = corp_code
+
+            if len(exact_matches) == len(search_names):
+                break
 
-        corp_code_cache[cache_key] = corp_codes
+        # 포함 매칭 우선, 없으면 정규화 매칭 사용
+        corp_codes = {**clean_matches, **exact_matches}
+
+        corp_code_cache[cache_key] = {'corp_codes': corp_codes, 'built_at': index['built_at']}
         return corp_codes
 
     except Exception as e:
         raise Exception(f"DART corp_code 조회 실패: {str(e)}")
 
 
-def get_dart_equity(company_id: str, year_count: int = 3):
-    """DART에서 별도 재무제표 기준 자본총계 조회"""
-    cache_key = f"equity_{company_id}_{year_count}"
-    if cache_key in dart_cache:
-        return dart_cache[cache_key]
-
-    if not DART_API_KEY:
-        raise ValueError("DART_API_KEY가 설정되지 않았습니다.")
+def fetch_dart_quarter(corp_code: str, year: int, reprt_code: str, quarter_end: str, quarter_name: str):
+    """DART 단일 분기 주요계정 조회 (자본총계 없으면 None)"""
+    try:
+        # 단일회사 주요계정 조회 API (더 간단하고 안정적)
+        url = "https://opendart.fss.or.kr/api/fnlttSinglAcnt.json"
+        params = {
+            'crtfc_key': DART_API_KEY,
+            'corp_code': corp_code,
+            'bsns_year': str(year),
+            'reprt_code': reprt_code
+        }
 
-    # 하드코딩된 corp_code 사용
-    corp_code = COMPANY_MAP[company_id]['corp_code']
+        response = SESSION.get(url, params=params, timeout=(HTTP_CONNECT_TIMEOUT, 30))
+        data = parse_json(response)
 
-    current_year = datetime.now().year
+        if data.get('status') != '000' or not data.get('list'):
+            return None
 
-    # 분기 데이터 수집
-    quarters_data = []
+        quarter_item = {'quarter': quarter_end}
 
-    for year in range(current_year - year_count, current_year + 1):
-        # 보고서 유형별 조회 (1분기, 반기, 3분기, 사업)
-        report_codes = [
-            ('11013', f'{year}-03-31', '1Q'),  # 1분기보고서
-            ('11012', f'{year}-06-30', '2Q'),  # 반기보고서
-            ('11014', f'{year}-09-30', '3Q'),  # 3분기보고서
-            ('11011', f'{year}-12-31', '4Q'),  # 사업보고서
-        ]
+        for item in data['list']:
+            # OFS: 별도, CFS: 연결
+            if item.get('fs_div', '') != 'OFS':
+                continue
 
-        for reprt_code, quarter_end, quarter_name in report_codes:
-            # 미래 분기는 건너뛰기
-            quarter_date = datetime.strptime(quarter_end, '%Y-%m-%d')
-            if quarter_date > datetime.now():
+            field = ACCOUNT_MAP.get(item.get('account_nm', '').replace(' ', ''))
+            if field is None:
                 continue
 
-            try:
-                # 단일회사 주요계정 조회 API (더 간단하고 안정적)
-                url = "https://opendart.fss.or.kr/api/fnlttSinglAcnt.json"
-                params = {
-                    'crtfc_key': DART_API_KEY,
-                    'corp_code': corp_code,
-                    'bsns_year': str(year),
-                    'reprt_code': reprt_code
-                }
+            amount_str = item.get('thstrm_amount', '0')
+            if not amount_str or amount_str == '-':
+                continue
 
-                response = requests.get(url, params=params, timeout=30)
-                data = response.json()
+            quarter_item[field] = int(amount_str.replace(',', ''))
 
-                if data.get('status') == '000' and data.get('list'):
-                    quarter_item = {'quarter': quarter_end}
+        return quarter_item if 'equity' in quarter_item else None
 
-                    for item in data['list']:
-                        account_nm = item.get('account_nm', '')
-                        fs_div = item.get('fs_div', '')  # OFS: 별도, CFS: 연결
+    except Exception as e:
+        print(f"DART 조회 오류 ({year} {quarter_name}): {e}")
+        return None
 
-                        if fs_div != 'OFS':
-                            continue
 
-                        amount_str = item.get('thstrm_amount', '0')
-                        if not amount_str or amount_str == '-':
-                            continue
+@cached_locked
+def get_dart_equity(company_id: str, year_count: int = 3):
+    """DART에서 별도 재무제표 기준 자본총계 조회"""
+    cache_key = f"equity_{company_id}_{year_count}"
+    if cache_key in dart_cache:
+        return dart_cache[cache_key]
 
-                        amount = int(amount_str.replace(',', ''))
+    if not DART_API_KEY:
+        raise ValueError("DART_API_KEY가 설정되지 않았습니다.")
 
-                        # 자본총계
-                        if '자본총계' in account_nm or account_nm == '자본 총계':
-                            quarter_item['equity'] = amount
-                        # 자산총계
-                        elif '자산총계' in account_nm or account_nm == '자산 총계':
-                            quarter_item['asset'] = amount
-                        # 부채총계
-                        elif '부채총계' in account_nm or account_nm == '부채 총계':
-                            quarter_item['liability'] = amount
+    # 하드코딩된 corp_code 사용
+    corp_code = COMPANY_MAP[company_id]['corp_code']
 
-                    if 'equity' in quarter_item:
-                        quarters_data.append(quarter_item)
+    today = date.today()
 
-            except Exception as e:
-                print(f"DART 조회 오류 ({year} {quarter_name}): {e}")
+    # 조회 대상 분기 목록 (미래 분기 제외)
+    jobs = []
+    for year in range(today.year - year_count, today.year + 1):
+        for reprt_code, (month, day), quarter_name in REPORT_CODES:
+            if date(year, month, day) > today:
                 continue
+            jobs.append((corp_code, year, reprt_code, f'{year}-{month:02d}-{day:02d}', quarter_name))
 
-    # 중복 제거 및 정렬
-    df = pd.DataFrame(quarters_data)
-    if df.empty:
+    # 분기별 조회는 네트워크 대기가 대부분이므로 병렬 실행
+    with ThreadPoolExecutor(max_workers=DART_FETCH_WORKERS) as executor:
+        results = list(executor.map(lambda job: fetch_dart_quarter(*job), jobs))
+
+    # 중복 제거 (분기말 기준)
+    quarters_data = {}
+    for item in results:
+        if item is not None:
+            quarters_data[item['quarter']] = item
+
+    if not quarters_data:
         raise ValueError("자본총계 데이터를 찾을 수 없습니다.")
 
-    df = df.drop_duplicates(subset=['quarter']).sort_values('quarter')
-    df = df.tail(year_count * 4)  # 최근 N년치만
+    # 정렬 후 최근 N년치만
+    result = [quarters_data[q] for q in sorted(quarters_data)]
+    result = result[max(len(result) - year_count * 4, 0):]
 
-    result = df.to_dict('records')
     dart_cache[cache_key] = result
     return result
 
@@ -225,8 +442,8 @@ def search_ecos_kr10y_code():
     try:
         # 시장금리(일별) 통계표의 항목 목록 조회
         url = f"https://ecos.bok.or.kr/api/StatisticItemList/{ECOS_API_KEY}/json/kr/1/100/817Y002"
-        response = requests.get(url, timeout=30)
-        data = response.json()
+        response = SESSION.get(url, timeout=(HTTP_CONNECT_TIMEOUT, 30))
+        data = parse_json(response)
 
         if 'StatisticItemList' in data and 'row' in data['StatisticItemList']:
             for item in data['StatisticItemList']['row']:
@@ -256,9 +473,40 @@ def search_ecos_kr10y_code():
         return ECOS_KR10Y_CODE
 
 
+def quarter_dates_key(quarter_dates: list):
+    """분기말 목록 전체에 대한 캐시 키 해시와 (시작일, 종료일) 반환"""
+    sorted_dates = sorted(quarter_dates)
+    key_hash = hashlib.blake2b(','.join(sorted_dates).encode(), digest_size=16).hexdigest()
+    return key_hash, sorted_dates[0], sorted_dates[-1]
+
+
+def map_to_quarter_ends(rates: dict, quarter_dates: list):
+    """일별 금리에서 분기말 당일 또는 직전 영업일(최대 9일 전) 값 추출"""
+    if not rates:
+        return {}
+
+    rate_dates = sorted(rates)
+    rate_days = np.array(rate_dates, dtype='datetime64[D]')
+    rate_values = np.array([rates[d] for d in rate_dates], dtype=float)
+    quarter_days = np.array(quarter_dates, dtype='datetime64[D]')
+
+    # 분기말 이하 가장 최근 관측일 위치
+    idx = np.searchsorted(rate_days, quarter_days, side='right') - 1
+    prior_days = rate_days[np.maximum(idx, 0)]
+    valid = (idx >= 0) & (quarter_days - prior_days <= np.timedelta64(RATE_LOOKBACK_DAYS, 'D'))
+
+    return {
+        q_date: float(rate_values[i])
+        for q_date, i, ok in zip(quarter_dates, idx, valid)
+        if ok
+    }
+
+
+@cached_locked
 def get_kr10y_rate(quarter_dates: list):
     """ECOS에서 한국 국고채 10년물 금리 조회"""
-    cache_key = f"kr10y_{'-'.join(quarter_dates[:3])}"
+    key_hash, first_date, last_date = quarter_dates_key(quarter_dates)
+    cache_key = f"kr10y_{key_hash}"
     if cache_key in ecos_cache:
         return ecos_cache[cache_key]
 
@@ -268,17 +516,16 @@ def get_kr10y_rate(quarter_dates: list):
     code_info = search_ecos_kr10y_code()
 
     # 날짜 범위 계산
-    start_date = min(quarter_dates).replace('-', '')
-    end_date = max(quarter_dates).replace('-', '')
+    end_date = last_date.replace('-', '')
 
     # 여유 있게 시작일 조정 (직전 영업일 대비)
-    start_dt = datetime.strptime(start_date, '%Y%m%d') - timedelta(days=10)
-    start_date = start_dt.strftime('%Y%m%d')
+    start_dt = date.fromisoformat(first_date) - timedelta(days=10)
+    start_date = start_dt.isoformat().replace('-', '')
 
     try:
         url = f"https://ecos.bok.or.kr/api/StatisticSearch/{ECOS_API_KEY}/json/kr/1/10000/{code_info['stat_code']}/D/{start_date}/{end_date}/{code_info['item_code']}"
-        response = requests.get(url, timeout=30)
-        data = response.json()
+        response = SESSION.get(url, timeout=(HTTP_CONNECT_TIMEOUT, 30))
+        data = parse_json(response)
 
         rates = {}
         if 'StatisticSearch' in data and 'row' in data['StatisticSearch']:
@@ -292,18 +539,7 @@ def get_kr10y_rate(quarter_dates: list):
                         pass
 
         # 분기말 금리 추출 (직전 영업일 값 사용)
-        result = {}
-        for q_date in quarter_dates:
-            if q_date in rates:
-                result[q_date] = rates[q_date]
-            else:
-                # 직전 영업일 찾기
-                q_dt = datetime.strptime(q_date, '%Y-%m-%d')
-                for i in range(1, 10):
-                    prev_date = (q_dt - timedelta(days=i)).strftime('%Y-%m-%d')
-                    if prev_date in rates:
-                        result[q_date] = rates[prev_date]
-                        break
+        result = map_to_quarter_ends(rates, quarter_dates)
 
         ecos_cache[cache_key] = result
         return result
@@ -312,9 +548,11 @@ def get_kr10y_rate(quarter_dates: list):
         raise Exception(f"ECOS 금리 조회 실패: {str(e)}")
 
 
+@cached_locked
 def get_us10y_rate(quarter_dates: list):
     """FRED에서 미국 10년물 금리 조회"""
-    cache_key = f"us10y_{'-'.join(quarter_dates[:3])}"
+    key_hash, first_date, last_date = quarter_dates_key(quarter_dates)
+    cache_key = f"us10y_{key_hash}"
     if cache_key in fred_cache:
         return fred_cache[cache_key]
 
@@ -322,12 +560,11 @@ def get_us10y_rate(quarter_dates: list):
         raise ValueError("FRED_API_KEY가 설정되지 않았습니다.")
 
     # 날짜 범위 계산
-    start_date = min(quarter_dates)
-    end_date = max(quarter_dates)
+    end_date = last_date
 
     # 여유 있게 시작일 조정
-    start_dt = datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=10)
-    start_date = start_dt.strftime('%Y-%m-%d')
+    start_dt = date.fromisoformat(first_date) - timedelta(days=10)
+    start_date = start_dt.isoformat()
 
     try:
         url = "https://api.stlouisfed.org/fred/series/observations"
@@ -339,8 +576,8 @@ def get_us10y_rate(quarter_dates: list):
             'observation_end': end_date
         }
 
-        response = requests.get(url, params=params, timeout=30)
-        data = response.json()
+        response = SESSION.get(url, params=params, timeout=(HTTP_CONNECT_TIMEOUT, 30))
+        data = parse_json(response)
 
         rates = {}
         if 'observations' in data:
@@ -354,18 +591,7 @@ def get_us10y_rate(quarter_dates: list):
                         pass
 
         # 분기말 금리 추출 (직전 영업일 값 사용)
-        result = {}
-        for q_date in quarter_dates:
-            if q_date in rates:
-                result[q_date] = rates[q_date]
-            else:
-                # 직전 영업일 찾기
-                q_dt = datetime.strptime(q_date, '%Y-%m-%d')
-                for i in range(1, 10):
-                    prev_date = (q_dt - timedelta(days=i)).strftime('%Y-%m-%d')
-                    if prev_date in rates:
-                        result[q_date] = rates[prev_date]
-                        break
+        result = map_to_quarter_ends(rates, quarter_dates)
 
         fred_cache[cache_key] = result
         return result
@@ -374,6 +600,24 @@ def get_us10y_rate(quarter_dates: list):
         raise Exception(f"FRED 금리 조회 실패: {str(e)}")
 
 
+def to_json_list(values: np.ndarray, ndigits: int):
+    """NaN을 None으로 바꾸고 반올림하여 JSON 직렬화 가능한 리스트로 변환"""
+    return [None if np.isnan(v) else round(float(v), ndigits) for v in values]
+
+
+def duration_kernel(eq: np.ndarray, rc: np.ndarray):
+    """듀레이션 계산 커널 (ndarray 전용): (클리핑된 듀레이션, 유효값 마스크) 반환"""
+    valid = ~(np.isnan(eq) | np.isnan(rc)) & (rc != 0)
+    valid[:1] = False
+
+    # 0 나눗셈 방지를 위해 무효 구간의 분모는 1로 대체
+    durations = eq / np.where(valid, rc, 1.0)
+
+    # 이상치 클리핑 (±100 범위로 제한)
+    durations = np.where(valid, np.clip(durations, -100, 100), np.nan)
+    return durations, valid
+
+
 def calculate_duration(equity_qoq: list, rate_change: list):
     """
     민감도 계산: D_t = equity_change / rate_change
@@ -381,25 +625,15 @@ def calculate_duration(equity_qoq: list, rate_change: list):
     양수: 금리와 자본이 같은 방향으로 움직임
     음수: 금리와 자본이 반대 방향으로 움직임
     """
-    duration_series = []
-    valid_durations = []
-
-    for i in range(len(equity_qoq)):
-        if i == 0 or equity_qoq[i] is None or rate_change[i] is None:
-            duration_series.append(None)
-        elif rate_change[i] == 0:
-            duration_series.append(None)
-        else:
-            d = equity_qoq[i] / rate_change[i]
-            # 이상치 클리핑 (±100 범위로 제한)
-            d_clipped = max(min(d, 100), -100)
-            duration_series.append(round(d_clipped, 2))
-            valid_durations.append(d_clipped)
+    durations, valid = duration_kernel(
+        np.asarray(equity_qoq, dtype=float),
+        np.asarray(rate_change, dtype=float)
+    )
 
     # Summary는 median 사용 (강건)
-    summary = round(median(valid_durations), 2) if valid_durations else None
+    summary = round(float(np.median(durations[valid])), 2) if valid.any() else None
 
-    return duration_series, summary
+    return to_json_list(durations, 2), summary
 
 
 # ============================================================================
@@ -454,9 +688,6 @@ def analyze():
             }), 500
 
         quarters = [item['quarter'] for item in equity_data]
-        equity_levels = [item['equity'] for item in equity_data]
-        asset_levels = [item.get('asset') for item in equity_data]
-        liability_levels = [item.get('liability') for item in equity_data]
 
         if len(quarters) < 2:
             return jsonify({
@@ -467,68 +698,70 @@ def analyze():
                 }
             }), 400
 
-        # 2. 금리 데이터 조회
-        try:
-            us10y_rates = get_us10y_rate(quarters)
-        except Exception as e:
-            return jsonify({
-                "error": {
-                    "source": "FRED",
-                    "message": "US 10Y 금리 조회 실패",
-                    "detail": str(e)
-                }
-            }), 500
+        # 2. 금리 데이터 조회 (FRED/ECOS 동시 요청)
+        executor = ThreadPoolExecutor(max_workers=2)
+        us10y_future = executor.submit(get_us10y_rate, quarters)
+        kr10y_future = executor.submit(get_kr10y_rate, quarters)
 
         try:
-            kr10y_rates = get_kr10y_rate(quarters)
-        except Exception as e:
-            return jsonify({
-                "error": {
-                    "source": "ECOS",
-                    "message": "KR 10Y 금리 조회 실패",
-                    "detail": str(e)
-                }
-            }), 500
+            try:
+                us10y_rates = us10y_future.result()
+            except Exception as e:
+                return jsonify({
+                    "error": {
+                        "source": "FRED",
+                        "message": "US 10Y 금리 조회 실패",
+                        "detail": str(e)
+                    }
+                }), 500
+
+            try:
+                kr10y_rates = kr10y_future.result()
+            except Exception as e:
+                return jsonify({
+                    "error": {
+                        "source": "ECOS",
+                        "message": "KR 10Y 금리 조회 실패",
+                        "detail": str(e)
+                    }
+                }), 500
+        finally:
+            # 오류 응답이 나머지 조회 완료를 기다리지 않도록 대기 없이 종료
+            executor.shutdown(wait=False, cancel_futures=True)
 
         # 3. 데이터 병합
         us10y_levels = [us10y_rates.get(q) for q in quarters]
         kr10y_levels = [kr10y_rates.get(q) for q in quarters]
 
         # 4. 변화율 계산
+        # 자본/자산/부채 총계 (열 순서: equity, asset, liability)
+        levels = np.array(
+            [(item['equity'], item.get('asset'), item.get('liability')) for item in equity_data],
+            dtype=float
+        )
+
         # 자본 변화율 (QoQ)
-        equity_qoq = [None]
-        for i in range(1, len(equity_levels)):
-            if equity_levels[i-1] and equity_levels[i-1] != 0:
-                change = (equity_levels[i] / equity_levels[i-1]) - 1
-                equity_qoq.append(round(change, 6))
-            else:
-                equity_qoq.append(None)
+        eq = levels[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            eq_qoq = np.where(eq[:-1] != 0, eq[1:] / eq[:-1] - 1.0, np.nan)
+        equity_qoq = to_json_list(np.concatenate(([np.nan], eq_qoq)), 6)
 
         # 금리 변화 (소수로 변환)
-        us10y_change = [None]
-        for i in range(1, len(us10y_levels)):
-            if us10y_levels[i] is not None and us10y_levels[i-1] is not None:
-                change = (us10y_levels[i] / 100) - (us10y_levels[i-1] / 100)
-                us10y_change.append(round(change, 6))
-            else:
-                us10y_change.append(None)
-
-        kr10y_change = [None]
-        for i in range(1, len(kr10y_levels)):
-            if kr10y_levels[i] is not None and kr10y_levels[i-1] is not None:
-                change = (kr10y_levels[i] / 100) - (kr10y_levels[i-1] / 100)
-                kr10y_change.append(round(change, 6))
-            else:
-                kr10y_change.append(None)
+        us10y = np.array(us10y_levels, dtype=float) / 100.0
+        us10y_change = to_json_list(np.concatenate(([np.nan], np.diff(us10y))), 6)
+
+        kr10y = np.array(kr10y_levels, dtype=float) / 100.0
+        kr10y_change = to_json_list(np.concatenate(([np.nan], np.diff(kr10y))), 6)
 
         # 5. 듀레이션 계산
         us10y_duration_series, us10y_duration_summary = calculate_duration(equity_qoq, us10y_change)
         kr10y_duration_series, kr10y_duration_summary = calculate_duration(equity_qoq, kr10y_change)
 
         # 6. 억원 단위로 변환
-        equity_level_billions = [round(e / 100000000, 1) if e else None for e in equity_levels]
-        asset_level_billions = [round(a / 100000000, 1) if a else None for a in asset_levels]
-        liability_level_billions = [round(l / 100000000, 1) if l else None for l in liability_levels]
+        levels_billions = np.where(levels != 0, levels / 100000000, np.nan)
+        equity_level_billions, asset_level_billions, liability_level_billions = (
+            to_json_list(column, 1) for column in levels_billions.T
+        )
 
         # 7. 응답 구성
         response = {
@@ -588,28 +821,21 @@ def search_corp():
         return jsonify({"error": "DART_API_KEY 미설정"}), 500
 
     try:
-        url = f"https://opendart.fss.or.kr/api/corpCode.xml?crtfc_key={DART_API_KEY}"
-        response = requests.get(url, timeout=60)
+        records = build_corp_index()['records']
+
+        # 앞에서부터 20건만 수집 (나머지 인덱스는 순회하지 않음)
+        results = [
+            {
+                "corp_name": corp_name,
+                "corp_code": corp_code,
+                "stock_code": stock_code
+            }
+            for corp_name, corp_code, stock_code in islice(
+                (record for record in records if keyword in record[0]), 20
+            )
+        ]
 
-        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-            xml_filename = z.namelist()[0]
-            with z.open(xml_filename) as f:
-                tree = ET.parse(f)
-                root = tree.getroot()
-
-        results = []
-        for corp in root.findall('.//list'):
-            corp_name = corp.find('corp_name').text if corp.find('corp_name') is not None else ''
-            if keyword in corp_name:
-                corp_code = corp.find('corp_code').text if corp.find('corp_code') is not None else ''
-                stock_code = corp.find('stock_code').text if corp.find('stock_code') is not None else ''
-                results.append({
-                    "corp_name": corp_name,
-                    "corp_code": corp_code,
-                    "stock_code": stock_code
-                })
-
-        return jsonify({"keyword": keyword, "results": results[:20]})
+        return jsonify({"keyword": keyword, "results": results})
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500